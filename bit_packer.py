@@ -0,0 +1,51 @@
+"""
+Pack variable width integers into a bit stream, and read them back
+"""
+from bitarray import bitarray
+from bitarray.util import int2ba
+
+FLUSH_BITS = 64  # Flush whole bytes once the accumulator holds this many bits
+
+
+class BitPacker:
+    """Accumulates integers MSB first and flushes them to a byte buffer in whole bytes"""
+    __slots__ = ('out', 'acc', 'nbits')
+
+    def __init__(self):
+        self.out = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def pack(self, value: int, length: int) -> None:
+        """Append the low `length` bits of value"""
+        self.acc = (self.acc << length) | (value & ((1 << length) - 1))
+        self.nbits += length
+        if self.nbits >= FLUSH_BITS:
+            residual = self.nbits & 7
+            self.out += (self.acc >> residual).to_bytes(self.nbits >> 3, 'big')
+            self.acc &= (1 << residual) - 1
+            self.nbits = residual
+
+    def __len__(self) -> int:
+        return len(self.out) * 8 + self.nbits
+
+    def to_bitarray(self) -> bitarray:
+        """Return all the packed bits"""
+        result = bitarray()
+        result.frombytes(bytes(self.out))
+        if self.nbits:
+            result.extend(int2ba(self.acc, length=self.nbits))
+        return result
+
+
+def big_endian_bytes(data: bitarray) -> bytes:
+    """Bytes of data with its bits MSB first, whatever the bitarray's endianness"""
+    return bitarray(data, endian='big').tobytes()
+
+
+def read_bits(buf: bytes, pos: int, length: int) -> int:
+    """Read `length` bits MSB first starting at bit offset pos of buf"""
+    end = pos + length
+    end_byte = (end + 7) >> 3
+    chunk = int.from_bytes(buf[pos >> 3:end_byte], 'big')
+    return (chunk >> ((end_byte << 3) - end)) & ((1 << length) - 1)
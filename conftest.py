@@ -0,0 +1,30 @@
+import pytest
+from bitarray import bitarray
+
+# Import every module under test once per session / xdist worker, at collection
+import main
+import huffman_coding
+import hashed_lampel_ziv
+import lampel_ziv
+import nat_encoder
+
+
+@pytest.fixture(scope='session', autouse=True)
+def warm_up_kernels():
+    # The numba kernels compile (or load from their cache) on their first call, not at import,
+    # so one tiny run of each pipeline keeps that cost out of the first test that uses them.
+    # As a fixture, a failure here is reported against the tests instead of aborting collection.
+    data = bitarray()
+    data.frombytes(b"warm up warm up")
+    main.decoder(main.encoder(data))
+    huffman_coding.huffman_decode(huffman_coding.huffman_encode(data))
+
+
+@pytest.fixture(scope='session')
+def encoder():
+    return main.encoder
+
+
+@pytest.fixture(scope='session')
+def decoder():
+    return main.decoder
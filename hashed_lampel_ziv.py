@@ -1,8 +1,143 @@
-from typing import List, Tuple, Dict
+from typing import Callable, List, Optional, Tuple
+import numpy as np
 from bitarray import bitarray
+from numba import njit
+from bit_packer import big_endian_bytes
 
+HASH_BASE = 257
+HASH_MASK = 0xFFFFFFFF
+HASH_MULTIPLIER = 2654435761  # Knuth's multiplicative constant, as used by LZ4
+EMPTY_SLOT = -1
+MAX_CHAIN = 64  # Default bound on the hash chain walked per step (zlib / LZ4 style)
+MIN_TABLE_BITS = 3   # Keeps a free slot to probe to even for an empty window
+MAX_TABLE_BITS = 32  # Slots are indexed by the top bits of a 32-bit hash product
 
-def hashed_lempel_ziv(data: bitarray, search_length: int, match_length: int, minimum_match_length: int, **kwargs) -> List[Tuple[int, int, bitarray]]:
+
+@njit(cache=True)
+def _extend_match(buf: np.ndarray, i: int, j: int, match_length: int, limit: int) -> int:
+    """
+    Count how many bytes starting at j match the bytes starting at i (compiled to native code)
+    """
+    length = 0
+    while length < match_length and i + length < limit and buf[j + length] == buf[i + length]:
+        length += 1
+    return length
+
+
+@njit(cache=True)
+def _longest_match(buf: np.ndarray, prev: np.ndarray, i: int, j: int, window_start: int,
+                   match_length: int, limit: int, max_chain: int) -> Tuple[int, int]:
+    """
+    Walk at most max_chain candidates of the hash chain starting at j, most recent first.
+    Returns (length, offset) of the longest match, preferring the closest one on ties.
+    """
+    best_length = 0
+    best_offset = 0
+    chain = 0
+    while j >= window_start and chain < max_chain:
+        length = _extend_match(buf, i, j, match_length, limit)
+        if length > best_length:
+            best_length = length
+            best_offset = i - j
+            if length == match_length:
+                break
+        j = prev[j]
+        chain += 1
+    return best_length, best_offset
+
+
+@njit(cache=True)
+def _rolling_hashes(buf: np.ndarray, minimum_match_length: int) -> np.ndarray:
+    """
+    Rabin-Karp hash of every minimum_match_length bytes window, rolled in O(1) per position
+    """
+    count = buf.shape[0] - minimum_match_length + 1
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+    hashes = np.empty(count, dtype=np.int64)
+
+    base_pow = 1
+    h = 0
+    for k in range(minimum_match_length):
+        base_pow = (base_pow * HASH_BASE) & HASH_MASK
+        h = (h * HASH_BASE + buf[k]) & HASH_MASK
+    hashes[0] = h
+
+    for pos in range(1, count):
+        h = (h * HASH_BASE + buf[pos + minimum_match_length - 1] - buf[pos - 1] * base_pow) & HASH_MASK
+        hashes[pos] = h
+    return hashes
+
+
+@njit(cache=True)
+def _find_slot(table_hashes: np.ndarray, table_positions: np.ndarray, h: int, shift: int) -> int:
+    """
+    Linear probe for the slot holding hash h, or the empty slot where it would go.
+    Each hash owns a single slot, so probing only stops at an empty slot or at h.
+    """
+    mask = table_hashes.shape[0] - 1
+    slot = ((h * HASH_MULTIPLIER) & HASH_MASK) >> shift
+    while table_positions[slot] != EMPTY_SLOT and table_hashes[slot] != h:
+        slot = (slot + 1) & mask
+    return slot
+
+
+@njit(cache=True)
+def _table_lookup(table_hashes: np.ndarray, table_positions: np.ndarray, h: int, window_start: int, shift: int) -> int:
+    """
+    Most recent position in the search window with hash h, or EMPTY_SLOT
+    """
+    slot = _find_slot(table_hashes, table_positions, h, shift)
+    if table_positions[slot] >= window_start:
+        return table_positions[slot]
+    return EMPTY_SLOT
+
+
+@njit(cache=True)
+def _table_rebuild(table_hashes: np.ndarray, table_positions: np.ndarray, hashes: np.ndarray,
+                   start: int, stop: int, shift: int) -> int:
+    """
+    Drop the entries that fell out of the search window by refilling the table with the
+    positions in [start, stop) only. Returns the number of occupied slots.
+    """
+    table_positions[:] = EMPTY_SLOT
+    occupied = 0
+    for pos in range(start, stop):
+        slot = _find_slot(table_hashes, table_positions, hashes[pos], shift)
+        if table_positions[slot] == EMPTY_SLOT:
+            occupied += 1
+        table_hashes[slot] = hashes[pos]
+        table_positions[slot] = pos
+    return occupied
+
+
+@njit(cache=True)
+def _table_insert(table_hashes: np.ndarray, table_positions: np.ndarray, prev: np.ndarray, hashes: np.ndarray,
+                  start: int, stop: int, window_start: int, shift: int, occupied: int) -> int:
+    """
+    Store each position in [start, stop) as the most recent position with its hash,
+    chaining it in prev to the position it replaces.
+    Once half of the slots are occupied, the table is rebuilt from the positions from
+    window_start on. Returns the number of occupied slots.
+    """
+    for pos in range(start, min(stop, hashes.shape[0])):
+        h = hashes[pos]
+        slot = _find_slot(table_hashes, table_positions, h, shift)
+        if table_positions[slot] == EMPTY_SLOT:
+            if 2 * occupied >= table_hashes.shape[0]:
+                occupied = _table_rebuild(table_hashes, table_positions, hashes, max(window_start, 0), pos, shift)
+                slot = _find_slot(table_hashes, table_positions, h, shift)
+            if table_positions[slot] == EMPTY_SLOT:
+                occupied += 1
+        prev[pos] = table_positions[slot]
+        table_hashes[slot] = h
+        table_positions[slot] = pos
+    return occupied
+
+
+def hashed_lempel_ziv(data: bitarray, search_length: int, match_length: int, minimum_match_length: int,
+                      max_chain: int = MAX_CHAIN, emit: Optional[Callable[[int, int, int], None]] = None,
+                      **kwargs) -> List[Tuple[int, int, bitarray]]:
     """
     Lempel-Ziv compression on a bitarray using hashed table
 
@@ -11,51 +146,59 @@ def hashed_lempel_ziv(data: bitarray, search_length: int, match_length: int, min
         search_length (int): The maximum length of the search buffer
         match_length (int): The maximum length of a matching substring
         minimum_match_length (int): The minimum match length to consider
+        max_chain (int): The maximum number of earlier positions tried per step
+        emit (Callable[[int, int, int], None], optional): Called with (offset_bytes, length_bytes, next_byte)
+            for every step as soon as it is found, next_byte being the byte value.
+            When given, nothing is collected and an empty list is returned.
 
     Returns:
         List[Tuple[int, int, bitarray]]: A list of tuples representing the compressed data.
         Each tuple contains (offset_bytes, length_bytes, next_byte_bits).
     """
     byte_count = len(data) // 8
+    buf = big_endian_bytes(data)  # Byte values must not depend on the input endianness
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    hashes = _rolling_hashes(arr[:byte_count], minimum_match_length)
     result = []
     i = 0
-    hash_table: Dict[str, List[int]] = {}
+
+    if emit is None:
+        def emit(offset: int, length: int, next_byte: int) -> None:
+            next_byte_bits = bitarray()
+            next_byte_bits.frombytes(bytes((next_byte,)))
+            result.append((offset, length, next_byte_bits))
+
+    # Open-addressed table keeping the most recent position per hash (LZ4 style).
+    # More than four times the live positions (the window, or the input if shorter), so a rebuild
+    # (at half full) leaves it under a quarter full.
+    # prev chains every position to the previous one with the same hash (zlib style).
+    table_bits = min(MAX_TABLE_BITS, max(MIN_TABLE_BITS, (4 * min(search_length, byte_count)).bit_length()))
+    shift = 32 - table_bits
+    table_hashes = np.zeros(1 << table_bits, dtype=np.int64)
+    table_positions = np.full(1 << table_bits, EMPTY_SLOT, dtype=np.int32)
+    prev = np.full(hashes.shape[0], EMPTY_SLOT, dtype=np.int32)
+    occupied = 0
 
     while i < byte_count:
         best_offset = 0
         best_length = 0
 
-        # Build hash key for minimum_match_length bytes starting at position i
+        window_start = max(0, i - search_length)
+
+        # Look for a match of the minimum_match_length bytes starting at position i
         if i + minimum_match_length <= byte_count:
-            hash_key = data[i*8:(i + minimum_match_length)*8].to01()
-
-            # Look for matches using hash table
-            if hash_key in hash_table:
-                for j in hash_table[hash_key]:
-                    if j >= max(0, i - search_length) and j < i:
-                        length = 0
-                        while (length < match_length and i + length < byte_count - 1 and
-                               data[(j + length)*8:(j + length + 1)*8] == data[(i + length)*8:(i + length + 1)*8]):
-                            length += 1
-
-                        if length > best_length:
-                            best_length = length
-                            best_offset = i - j        # Update hash table with current position
-        for start_pos in range(max(0, i - minimum_match_length + 1), i + 1):
-            if start_pos + minimum_match_length <= byte_count:
-                key = data[start_pos*8:(start_pos + minimum_match_length)*8].to01()
-
-                if key not in hash_table:
-                    hash_table[key] = []
-                hash_table[key].append(start_pos)
-
-        # Next byte after the match
-        next_byte = data[(i + best_length)*8:(i + best_length + 1)*8]
-
-        # Append the tuple (offset_bytes, length_bytes, next_byte_bits)
-        result.append((best_offset, best_length, next_byte))
-
-        # Move the index forward
-        i += best_length + 1
+            j = _table_lookup(table_hashes, table_positions, hashes[i], window_start, shift)
+            if j != EMPTY_SLOT:
+                best_length, best_offset = _longest_match(arr, prev, i, j, window_start, match_length,
+                                                          byte_count - 1, max_chain)
+
+        # Emit (offset_bytes, length_bytes, next_byte) with the byte after the match
+        emit(best_offset, best_length, buf[i + best_length])
+
+        # Move the index forward, inserting every position passed over into the hash table once
+        next_i = i + best_length + 1
+        occupied = _table_insert(table_hashes, table_positions, prev, hashes, i, next_i,
+                                 max(0, next_i - search_length), shift, occupied)
+        i = next_i
 
     return result
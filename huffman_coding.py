@@ -1,15 +1,26 @@
 import heapq
 from typing import Dict, List, Tuple, Optional
+import numpy as np
 from bitarray import bitarray
+from bitarray.util import ba2int, int2ba
 from collections import Counter
+from numba import njit
+from bit_packer import BitPacker, big_endian_bytes, read_bits
 
 LENGTH_FIELD_BITS = 17    # Store length in BYTES
 TREE_SIZE_FIELD_BITS = 16 # Tree size in bits: 2^16 = 64KB max tree # TODO maybe we can lower it
 SYMBOL_BITS_FIELD = 6     # Symbol size: 2^6 = 64 max (covers 1-32 bit symbols)  
 # TODO SYMBOL_BITS_FIELD only relevant if we want to run more than one param in the algo!
+DECODE_TABLE_BITS = 12   # Max code bits resolved by a single decode table lookup
+WINDOW_BITS = 64         # Encoded bits read at once by the decoder
+SYMBOL_DTYPES = {8: np.uint8, 16: np.dtype('>u2'), 32: np.dtype('>u4')}  # Byte aligned symbols, read big endian
+DENSE_SYMBOL_BITS = (8, 16)   # Symbol sizes small enough for flat per-symbol arrays (histogram, kernel code tables)
+KERNEL_MAX_CODE_BITS = 56     # Longest code the kernel's 64-bit accumulator can take
 
 class HuffmanNode:
     """Node class for building the Huffman tree"""
+    __slots__ = ('symbol', 'frequency', 'left', 'right')
+
     def __init__(self, symbol: Optional[int] = None, frequency: int = 0,
                  left: Optional['HuffmanNode'] = None, right: Optional['HuffmanNode'] = None):
         self.symbol = symbol
@@ -26,6 +37,44 @@ class HuffmanNode:
         return self.left is None and self.right is None
 
 
+@njit(cache=True)
+def _pack_codes(symbols: np.ndarray, codes: np.ndarray, code_lengths: np.ndarray) -> Tuple[np.ndarray, int]:
+    """
+    Bit pack the code of every symbol into bytes (compiled to native code).
+    Returns the packed bytes and the number of valid bits in them.
+    """
+    bit_count = 0
+    for symbol in symbols:
+        bit_count += code_lengths[symbol]
+    out = np.zeros((bit_count + 7) >> 3, dtype=np.uint8)
+
+    acc = 0
+    nbits = 0
+    out_pos = 0
+    for symbol in symbols:
+        acc = (acc << code_lengths[symbol]) | codes[symbol]
+        nbits += code_lengths[symbol]
+        while nbits >= 8:
+            nbits -= 8
+            out[out_pos] = (acc >> nbits) & 0xFF
+            out_pos += 1
+        acc &= (1 << nbits) - 1
+    if nbits:
+        out[out_pos] = (acc << (8 - nbits)) & 0xFF
+    return out, bit_count
+
+
+def read_symbols(data: bitarray, symbol_bits: int = 8) -> List[int]:
+    """
+    Split the input data into symbol values of symbol_bits each (the last one may be shorter).
+    """
+    # Byte aligned symbols: read them straight from the underlying bytes
+    if symbol_bits in SYMBOL_DTYPES and len(data) % symbol_bits == 0:
+        return np.frombuffer(big_endian_bytes(data), dtype=SYMBOL_DTYPES[symbol_bits]).tolist()
+    data = bitarray(data, endian='big')  # ba2int reads the bits in the bitarray's endianness
+    return [ba2int(data[i:i + symbol_bits]) for i in range(0, len(data), symbol_bits)]
+
+
 def build_frequency_table(data: bitarray, symbol_bits: int = 8) -> Dict[int, int]:
     """
     Build frequency table for symbols in the input data.
@@ -33,61 +82,69 @@ def build_frequency_table(data: bitarray, symbol_bits: int = 8) -> Dict[int, int
     if len(data) == 0:
         return {}
 
-    frequency_counter = Counter()
+    # Byte aligned symbols: count them straight from the underlying bytes
+    if symbol_bits in SYMBOL_DTYPES and len(data) % symbol_bits == 0:
+        symbols = np.frombuffer(big_endian_bytes(data), dtype=SYMBOL_DTYPES[symbol_bits])
+        if symbol_bits in DENSE_SYMBOL_BITS:
+            # Small alphabet: a flat histogram, keeping only the symbols that occur
+            counts = np.bincount(symbols, minlength=1 << symbol_bits)
+            values = np.flatnonzero(counts)
+            return dict(zip(values.tolist(), counts[values].tolist()))
+        values, counts = np.unique(symbols, return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
 
-    # Process data in chunks of symbol_bits
-    for i in range(0, len(data), symbol_bits):
-        symbol_chunk = data[i:i + symbol_bits]
-        symbol_value = int(symbol_chunk.to01(), 2)
-        frequency_counter[symbol_value] += 1
-
-    return dict(frequency_counter)
+    return dict(Counter(read_symbols(data, symbol_bits)))
 
 
 def build_huffman_tree(frequency_table: Dict[int, int]) -> Optional[HuffmanNode]:
     """
     Build Huffman tree from frequency table.
     """
-    # Create a min-heap with leaf nodes
+    # Create a min-heap with leaf nodes, ordered by (frequency, creation order)
+    # so that heap comparisons stay on ints and never reach HuffmanNode.__lt__
     heap = []
-    for symbol, freq in frequency_table.items():
-        node = HuffmanNode(symbol=symbol, frequency=freq)
-        heapq.heappush(heap, node)
+    for order, (symbol, freq) in enumerate(frequency_table.items()):
+        heap.append((freq, order, HuffmanNode(symbol=symbol, frequency=freq)))
+    heapq.heapify(heap)
+    order = len(heap)
 
     # Build the tree bottom-up
     while len(heap) > 1:
         # Get two nodes with the lowest frequency
-        left = heapq.heappop(heap)
-        right = heapq.heappop(heap)
+        left_freq, _, left = heapq.heappop(heap)
+        right_freq, _, right = heapq.heappop(heap)
 
         # Create internal node
-        merged_freq = left.frequency + right.frequency
+        merged_freq = left_freq + right_freq
         internal_node = HuffmanNode(frequency=merged_freq, left=left, right=right)
 
-        heapq.heappush(heap, internal_node)
+        heapq.heappush(heap, (merged_freq, order, internal_node))
+        order += 1
 
-    return heap[0]  # tree root
+    return heap[0][2]  # tree root
 
 
-def generate_huffman_codes(root: HuffmanNode) -> Dict[int, str]:
+def generate_huffman_codes(root: HuffmanNode) -> Dict[int, Tuple[int, int]]:
     """
     Generate Huffman codes from the tree.
+    Each symbol maps to (code, code_length), the code bits being the low code_length bits of code.
     """
     if root is None:
         return {}
 
     codes = {}
+    stack = [(root, 0, 0)]
 
-    def traverse(node: HuffmanNode, code: str = ""):
+    while stack:
+        node, code, length = stack.pop()
         if node.is_leaf():
-            codes[node.symbol] = code if code else "0"
+            codes[node.symbol] = (code, length) if length else (0, 1)
         else:
-            if node.left:
-                traverse(node.left, code + "0")
             if node.right:
-                traverse(node.right, code + "1")
+                stack.append((node.right, (code << 1) | 1, length + 1))
+            if node.left:
+                stack.append((node.left, code << 1, length + 1))
 
-    traverse(root)
     return codes
 
 
@@ -101,22 +158,21 @@ def serialize_tree(root: Optional[HuffmanNode], symbol_bits: int = 8) -> bitarra
     if root is None:
         return bitarray()
 
-    result = bitarray()
+    packer = BitPacker()
+    stack = [root]
 
-    def serialize_node(node: HuffmanNode):
+    while stack:
+        node = stack.pop()
         if node.is_leaf():
-            result.append(1)  # Leaf marker
-            symbol_bits_str = f'{node.symbol:0{symbol_bits}b}'  # Add the symbol as {symbol_bits} bits
-            result.extend(bitarray(symbol_bits_str))
+            packer.pack((1 << symbol_bits) | node.symbol, 1 + symbol_bits)  # Leaf marker and the symbol
         else:
-            result.append(0)  # Internal node marker
-            if node.left:
-                serialize_node(node.left)
+            packer.pack(0, 1)  # Internal node marker
             if node.right:
-                serialize_node(node.right)
+                stack.append(node.right)
+            if node.left:
+                stack.append(node.left)
 
-    serialize_node(root)
-    return result
+    return packer.to_bitarray()
 
 
 def deserialize_tree(data: bitarray, symbol_bits: int = 8) -> Tuple[Optional[HuffmanNode], int]:
@@ -126,19 +182,89 @@ def deserialize_tree(data: bitarray, symbol_bits: int = 8) -> Tuple[Optional[Huf
     if len(data) == 0:
         return None, 0
 
-    def deserialize_node(pos: int) -> Tuple[HuffmanNode, int]:
-
-        if data[pos]:  # Leaf
-            symbol_chunk = data[pos + 1:pos + 1 + symbol_bits]
-            symbol = int(symbol_chunk.to01(), 2)
-            return HuffmanNode(symbol=symbol), pos + 1 + symbol_bits
+    buf = big_endian_bytes(data)
+    root = None
+    pending = []  # Internal nodes still missing a child, innermost last
+    pos = 0
+
+    while True:
+        if pos >= len(data):  # read_bits past the end gives 0s, read as endless internal nodes
+            raise ValueError(f"Truncated tree at bit {pos}")
+        if read_bits(buf, pos, 1):  # Leaf
+            if pos + 1 + symbol_bits > len(data):
+                raise ValueError(f"Truncated tree at bit {pos}")
+            node = HuffmanNode(symbol=read_bits(buf, pos + 1, symbol_bits))
+            pos += 1 + symbol_bits
         else:  # Internal node
-            left_node, new_pos = deserialize_node(pos + 1)
-            right_node, final_pos = deserialize_node(new_pos)
-            return HuffmanNode(left=left_node, right=right_node), final_pos
+            node = HuffmanNode()
+            pos += 1
+
+        if not pending:
+            root = node
+        elif pending[-1].left is None:
+            pending[-1].left = node
+        else:
+            pending.pop().right = node
 
-    root, consumed = deserialize_node(0)
-    return root, consumed
+        if node.symbol is None:
+            pending.append(node)
+        if not pending:
+            return root, pos
+
+
+def build_decode_table(root: HuffmanNode, table_bits: int) -> Tuple[List[int], List[int], List[Optional[HuffmanNode]]]:
+    """
+    Build a lookup table indexed by the next table_bits bits of the encoded stream.
+    Entry i holds the symbol whose code prefixes i and that code's length. Codes longer
+    than table_bits get instead the internal node reached after table_bits bits.
+    """
+    size = 1 << table_bits
+    symbols = [0] * size
+    lengths = [table_bits] * size
+    nodes: List[Optional[HuffmanNode]] = [None] * size
+
+    if root.is_leaf():  # A lone symbol decodes from either bit
+        return [root.symbol] * size, [1] * size, nodes
+
+    stack = [(root, 0, 0)]
+    while stack:
+        node, code, depth = stack.pop()
+        if node.is_leaf():
+            start = code << (table_bits - depth)
+            end = (code + 1) << (table_bits - depth)
+            symbols[start:end] = [node.symbol] * (end - start)
+            lengths[start:end] = [depth] * (end - start)
+        elif depth == table_bits:
+            nodes[code] = node
+        else:
+            stack.append((node.right, (code << 1) | 1, depth + 1))
+            stack.append((node.left, code << 1, depth + 1))
+
+    return symbols, lengths, nodes
+
+
+def encode_symbols(data: bitarray, codes: Dict[int, Tuple[int, int]], symbol_bits: int = 8) -> bitarray:
+    """
+    Replace every symbol of the data with its Huffman code.
+    """
+    max_code_length = max(length for _, length in codes.values())
+    if symbol_bits in DENSE_SYMBOL_BITS and len(data) % symbol_bits == 0 and max_code_length <= KERNEL_MAX_CODE_BITS:
+        symbols = np.frombuffer(big_endian_bytes(data), dtype=SYMBOL_DTYPES[symbol_bits]).astype(np.int64)
+        code_table = np.zeros(1 << symbol_bits, dtype=np.int64)
+        length_table = np.zeros(1 << symbol_bits, dtype=np.int64)
+        for symbol, (code, length) in codes.items():
+            code_table[symbol] = code
+            length_table[symbol] = length
+        packed, bit_count = _pack_codes(symbols, code_table, length_table)
+        encoded = bitarray()
+        encoded.frombytes(packed.tobytes())
+        return encoded[:bit_count]
+
+    packer = BitPacker()
+    for symbol_value in read_symbols(data, symbol_bits):
+        if symbol_value in codes:
+            packer.pack(*codes[symbol_value])
+    return packer.to_bitarray()
 
 
 def huffman_encode(data: bitarray, symbol_bits: int = 8) -> bitarray:
@@ -157,26 +283,24 @@ def huffman_encode(data: bitarray, symbol_bits: int = 8) -> bitarray:
     result = bitarray()
 
     # Store symbol_bits
-    result.extend(bitarray(f'{symbol_bits:0{SYMBOL_BITS_FIELD}b}'))
+    result.extend(int2ba(symbol_bits, length=SYMBOL_BITS_FIELD))
 
     # Serialize the tree (calc the tree size and insert in the header)
     serialized_tree = serialize_tree(tree_root, symbol_bits)
     tree_size = len(serialized_tree)
     if tree_size >= (1 << TREE_SIZE_FIELD_BITS):
         raise ValueError(f"Tree too large: {tree_size} bits")
-    result.extend(bitarray(f'{tree_size:0{TREE_SIZE_FIELD_BITS}b}'))
+    result.extend(int2ba(tree_size, length=TREE_SIZE_FIELD_BITS))
     result.extend(serialized_tree)
 
     # Store original data length in BYTES
     original_length_bytes = len(data) // 8
-    result.extend(bitarray(f'{original_length_bytes:0{LENGTH_FIELD_BITS}b}'))
+    if original_length_bytes >= (1 << LENGTH_FIELD_BITS):
+        raise ValueError(f"Data too large: {original_length_bytes} bytes")
+    result.extend(int2ba(original_length_bytes, length=LENGTH_FIELD_BITS))
 
     # Encode the data
-    for i in range(0, len(data), symbol_bits):
-        symbol_chunk = data[i:i + symbol_bits]
-        symbol_value = int(symbol_chunk.to01(), 2)
-        if symbol_value in codes:
-            result.extend(bitarray(codes[symbol_value]))
+    result.extend(encode_symbols(data, codes, symbol_bits))
 
     return result
 
@@ -187,14 +311,15 @@ def huffman_decode(compressed_data: bitarray) -> bitarray:
     """
     if len(compressed_data) == 0:
         return bitarray()
+    compressed_data = bitarray(compressed_data, endian='big')  # Fields are read MSB first
 
     # read symbol_bits param
     symbol_bits_data = compressed_data[:SYMBOL_BITS_FIELD]
-    symbol_bits = int(symbol_bits_data.to01(), 2)
+    symbol_bits = ba2int(symbol_bits_data)
 
     # Read tree size and serialized tree
     tree_size_bits = compressed_data[SYMBOL_BITS_FIELD:SYMBOL_BITS_FIELD + TREE_SIZE_FIELD_BITS]
-    tree_size = int(tree_size_bits.to01(), 2)
+    tree_size = ba2int(tree_size_bits)
     tree_start = SYMBOL_BITS_FIELD + TREE_SIZE_FIELD_BITS
     tree_end = tree_start + tree_size
     tree_data = compressed_data[tree_start:tree_end]
@@ -202,7 +327,7 @@ def huffman_decode(compressed_data: bitarray) -> bitarray:
 
     # Read original data length in BYTES
     original_length_bits_field = compressed_data[tree_end:tree_end + LENGTH_FIELD_BITS]
-    original_length_bytes = int(original_length_bits_field.to01(), 2)
+    original_length_bytes = ba2int(original_length_bits_field)
     original_length_bits = original_length_bytes * 8
 
     # Decode the compressed content
@@ -211,25 +336,41 @@ def huffman_decode(compressed_data: bitarray) -> bitarray:
     if tree_root is None:
         return bitarray()
 
-    # Decode using the tree
-    result = bitarray()
-    current_node = tree_root
-
-    for bit in encoded_data:
-        # Traverse the tree
-        if bit == 0 and current_node.left:
-            current_node = current_node.left
-        elif bit == 1 and current_node.right:
-            current_node = current_node.right
-
-        # Check if we reached a leaf
-        if current_node.is_leaf():
-            symbol_bits_str = f'{current_node.symbol:0{symbol_bits}b}'
-            result.extend(bitarray(symbol_bits_str))
-            current_node = tree_root  # Reset to root
-
-            # Stop if we've decoded enough bits
-            if len(result) >= original_length_bits:
-                break
-
-    return result[:original_length_bits]
+    # Decode using the table, walking the tree only for codes longer than the table index
+    max_code_length = max(length for _, length in generate_huffman_codes(tree_root).values())
+    table_bits = min(DECODE_TABLE_BITS, max_code_length)
+    table_symbols, table_lengths, table_nodes = build_decode_table(tree_root, table_bits)
+
+    symbol_count = -(-original_length_bits // symbol_bits)
+    encoded_length = len(encoded_data)
+    encoded_bytes = encoded_data.tobytes() + bytes(WINDOW_BITS // 8)  # Pad so the last window is full
+    index_mask = (1 << table_bits) - 1
+    packer = BitPacker()
+    pos = 0
+
+    # The next bits are read from a 64 bit window starting at byte window_start
+    window_start = 0
+    window = int.from_bytes(encoded_bytes[:WINDOW_BITS // 8], 'big')
+
+    for _ in range(symbol_count):
+        if pos >= encoded_length:
+            break
+        window_offset = pos - (window_start << 3)
+        if window_offset > WINDOW_BITS - table_bits:  # Refill from the byte holding pos
+            window_start = pos >> 3
+            window = int.from_bytes(encoded_bytes[window_start:window_start + WINDOW_BITS // 8], 'big')
+            window_offset = pos & 7
+        index = (window >> (WINDOW_BITS - window_offset - table_bits)) & index_mask
+        node = table_nodes[index]
+        if node is None:
+            symbol = table_symbols[index]
+            pos += table_lengths[index]
+        else:
+            pos += table_bits
+            while not node.is_leaf():
+                node = node.right if read_bits(encoded_bytes, pos, 1) else node.left
+                pos += 1
+            symbol = node.symbol
+        packer.pack(symbol, symbol_bits)
+
+    return packer.to_bitarray()[:original_length_bits]
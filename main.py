@@ -3,12 +3,13 @@ import time
 import csv
 from datetime import datetime
 from bitarray import bitarray
+from bit_packer import BitPacker, big_endian_bytes
 from lampel_ziv import convert_lampel_ziv_list_to_binarray
-from hashed_lampel_ziv import hashed_lempel_ziv
-from nat_encoder import encode_number, decode_number, SMALL_NUMBER_BITS
+from hashed_lampel_ziv import hashed_lempel_ziv, MAX_CHAIN
+from nat_encoder import number_code_table, decode_number, SMALL_NUMBER_BITS
 
 # PAY ATTENTION: add new config keys at the end of this list
-ALL_CONFIG_KEYS = ['method', 'notes', 'search_length', 'match_length', 'small_number_bits', 'minimum_match_length', 'symbol_bits']
+ALL_CONFIG_KEYS = ['method', 'notes', 'search_length', 'match_length', 'small_number_bits', 'minimum_match_length', 'symbol_bits', 'max_chain']
 
 CONFIG = {
     'method': 'hashed_lempel_ziv',
@@ -17,7 +18,8 @@ CONFIG = {
     'notes': '',
     'small_number_bits': SMALL_NUMBER_BITS,
     'minimum_match_length': 3,
-    'symbol_bits': 8
+    'symbol_bits': 8,
+    'max_chain': MAX_CHAIN
 }
 
 RESULT_KEYS = ['run_id', 'filename', 'encode_time', 'decode_time', 'original_bits', 'compressed_bits', 'compression_ratio']
@@ -111,14 +113,19 @@ def encoder(data: bitarray) -> bitarray:
     if len(data) == 0:
         return bitarray()
 
-    lz_list = hashed_lempel_ziv(data, **CONFIG)
-    result = bitarray()
-    for offset, length, next_byte in lz_list:
-        encode_number(result, offset)
-        encode_number(result, length)
-        result.extend(next_byte)
+    packer = BitPacker()
+    # Offsets and lengths are bounded by the config, so their codes are looked up rather than computed
+    offset_codes = number_code_table(CONFIG['search_length'])
+    length_codes = number_code_table(CONFIG['match_length'])
 
-    return result
+    def emit(offset: int, length: int, next_byte: int) -> None:
+        offset_value, offset_width = offset_codes[offset]
+        length_value, length_width = length_codes[length]
+        packer.pack((((offset_value << length_width) | length_value) << 8) | next_byte,
+                    offset_width + length_width + 8)
+
+    hashed_lempel_ziv(data, emit=emit, **CONFIG)
+    return packer.to_bitarray()
 
 
 def decoder(compressed_data: bitarray) -> bitarray:
@@ -135,12 +142,13 @@ def decoder(compressed_data: bitarray) -> bitarray:
         return bitarray()
 
     lz_list = []
-    data_copy = compressed_data.copy()
-    while len(data_copy) > 0:
-        offset = decode_number(data_copy)
-        length = decode_number(data_copy)
-        next_byte = data_copy[:8]
-        del data_copy[:8]
+    buf = big_endian_bytes(compressed_data)
+    pos = 0
+    while pos < len(compressed_data):
+        offset, pos = decode_number(buf, pos)
+        length, pos = decode_number(buf, pos)
+        next_byte = compressed_data[pos:pos + 8]
+        pos += 8
         lz_list.append((offset, length, next_byte))
 
     return convert_lampel_ziv_list_to_binarray(lz_list)
@@ -1,42 +1,49 @@
 """
 Encode a natural number
 """
-from bitarray import bitarray
-from bitarray.util import ba2int, int2ba
-import math
+from functools import lru_cache
+from typing import Tuple
+from bit_packer import BitPacker, read_bits
 
 SMALL_NUMBER_BITS = 3
+PREFIX_SCAN_BITS = 64  # Bits read at once when looking for the end of the loglog(n) zeros
 
-def encode_number(bit_data: bitarray, number: int) -> None:
+def number_code(number: int) -> Tuple[int, int]:
+    """Return the encoding of number as (value, width), its bits being the low width bits of value"""
     if number < 0:
         raise ValueError(f'Unexpected negative: {number}')
     # Small numbers: 1 then SMALL_NUMBER_BITS bits for the number
     if number < (1 << SMALL_NUMBER_BITS):
-        bit_data.extend([1])  # Flag for small number
-        number_bits = int2ba(number, length=SMALL_NUMBER_BITS)
-        bit_data.extend(number_bits)
-        return
+        return (1 << SMALL_NUMBER_BITS) | number, 1 + SMALL_NUMBER_BITS
     # Bit number: #0 = loglog(n), then log(n), then n
-    logn = 1 + math.floor(math.log2(number))
-    loglogn = 1 + math.floor(math.log2(logn))
-    bit_data.extend([0] * loglogn)
-    bit_data.extend(int2ba(logn))
-    bit_data.extend(int2ba(number))
-    
-
-def decode_number(bit_data: bitarray) -> int:
-    first_bit = bit_data[0]
+    # The loglog(n) zeros are the leading zeros of the packed value
+    logn = number.bit_length()
+    loglogn = logn.bit_length()
+    return (logn << logn) | number, 2 * loglogn + logn
+
+
+@lru_cache(maxsize=None)
+def number_code_table(max_number: int) -> Tuple[Tuple[int, int], ...]:
+    """Precompute number_code for every number in [0, max_number]"""
+    return tuple(number_code(number) for number in range(max_number + 1))
+
+
+def encode_number(packer: BitPacker, number: int) -> None:
+    packer.pack(*number_code(number))
+
+
+def decode_number(buf: bytes, pos: int) -> Tuple[int, int]:
+    """Decode the number starting at bit offset pos, return it and the offset right after it"""
     # Small number
-    if first_bit == 1:
-        number_bits = bit_data[1:1+SMALL_NUMBER_BITS]
-        del bit_data[:1+SMALL_NUMBER_BITS]
-        return ba2int(number_bits)
+    if read_bits(buf, pos, 1):
+        return read_bits(buf, pos + 1, SMALL_NUMBER_BITS), pos + 1 + SMALL_NUMBER_BITS
     # Big number
-    first_1_idx = bit_data.find(1)
-    loglogn = first_1_idx
-    logn_end_idx = first_1_idx + loglogn
-    logn = ba2int(bit_data[first_1_idx: logn_end_idx])
-    n_end_idx = logn_end_idx + logn
-    num = ba2int(bit_data[logn_end_idx: n_end_idx])
-    del bit_data[:n_end_idx]
-    return num
+    # loglog(n) is the count of leading zeros, found with one wide read instead of a bit scan
+    width = min(PREFIX_SCAN_BITS, len(buf) * 8 - pos)
+    word = read_bits(buf, pos, width)
+    if word == 0:
+        raise ValueError(f'Truncated number at bit {pos}')
+    loglogn = width - word.bit_length()
+    logn = read_bits(buf, pos + loglogn, loglogn)
+    number_start = pos + 2 * loglogn
+    return read_bits(buf, number_start, logn), number_start + logn
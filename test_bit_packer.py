@@ -0,0 +1,66 @@
+from bitarray import bitarray
+from bit_packer import BitPacker, FLUSH_BITS, big_endian_bytes, read_bits
+
+def test_empty():
+    packer = BitPacker()
+    assert packer.to_bitarray() == bitarray()
+    assert len(packer) == 0
+
+def test_pack_small_values():
+    packer = BitPacker()
+    packer.pack(1, 1)
+    packer.pack(0, 2)
+    packer.pack(5, 3)
+    assert packer.to_bitarray() == bitarray('100101')
+    assert len(packer) == 6
+
+def test_pack_across_flush():
+    """Values crossing the flush boundary keep their bit order"""
+    packer = BitPacker()
+    expected = bitarray()
+    for i in range(100):
+        packer.pack(i, 7)
+        expected.extend(f'{i:07b}')
+    assert packer.to_bitarray() == expected
+    assert len(packer) == 700
+
+def test_pack_wide_value():
+    """A single value wider than the flush threshold"""
+    packer = BitPacker()
+    packer.pack(1, 1)
+    packer.pack((1 << (2 * FLUSH_BITS)) - 1, 2 * FLUSH_BITS)
+    packer.pack(0, 3)
+    assert packer.to_bitarray() == bitarray('1') * (2 * FLUSH_BITS + 1) + bitarray('000')
+
+def test_pack_masks_wide_value():
+    """Bits of value above `length` do not leak into the bits packed before it"""
+    packer = BitPacker()
+    packer.pack(0, 4)
+    packer.pack(0b110101, 2)
+    assert packer.to_bitarray() == bitarray('000001')
+
+def test_read_bits():
+    buf = bitarray('10110011 10001111 01').tobytes()
+    assert read_bits(buf, 0, 1) == 1
+    assert read_bits(buf, 1, 3) == 0b011
+    assert read_bits(buf, 6, 5) == 0b11100
+    assert read_bits(buf, 8, 8) == 0b10001111
+    assert read_bits(buf, 4, 14) == 0b00111000111101
+    assert read_bits(buf, 3, 0) == 0
+
+def test_pack_then_read():
+    packer = BitPacker()
+    values = [(i * 37) % (1 << (i % 20 + 1)) for i in range(200)]
+    for i, value in enumerate(values):
+        packer.pack(value, i % 20 + 1)
+    buf = packer.to_bitarray().tobytes()
+    pos = 0
+    for i, value in enumerate(values):
+        assert read_bits(buf, pos, i % 20 + 1) == value
+        pos += i % 20 + 1
+
+def test_big_endian_bytes():
+    """Byte values follow the bit order, not the bitarray's endianness"""
+    for endian in ('big', 'little'):
+        data = bitarray('10110011 10001111 01', endian=endian)
+        assert big_endian_bytes(data) == bytes((0b10110011, 0b10001111, 0b01000000))
@@ -1,8 +1,70 @@
+import os
+import unittest
+import numpy as np
+import pytest
 from bitarray import bitarray
+from bitarray.util import zeros, ones
+from numba import njit
 from huffman_coding import (
     build_frequency_table, build_huffman_tree, generate_huffman_codes,
-    huffman_encode, huffman_decode, serialize_tree, deserialize_tree
+    huffman_encode, huffman_decode, serialize_tree, deserialize_tree, read_symbols, encode_symbols,
+    DECODE_TABLE_BITS, KERNEL_MAX_CODE_BITS, LENGTH_FIELD_BITS
 )
+from bit_packer import BitPacker
+
+# Set COMPRESSOR_TEST_VERBOSE to print the compression sizes and ratios
+_VERBOSE = bool(os.environ.get('COMPRESSOR_TEST_VERBOSE'))
+
+# Larger static inputs, built once at import
+_REPETITIVE = b"a" * 100
+_DIVERSE = b"abcdefghijklmnopqrstuvwxyz" * 3
+
+
+def _fibonacci_skewed(symbol_count: int) -> bytes:
+    # Symbol k occurs fib(k + 1) times, the most skewed tree: the rarest codes are symbol_count - 1 bits
+    counts = [1, 1]
+    while len(counts) < symbol_count:
+        counts.append(counts[-1] + counts[-2])
+    return b"".join(bytes((symbol,)) * count for symbol, count in enumerate(counts))
+
+
+def b2ba(data: bytes) -> bitarray:
+    ba = bitarray()
+    ba.frombytes(data)
+    return ba
+
+
+def _roundtrip(data: bitarray, symbol_bits: int = 8) -> bitarray:
+    return huffman_decode(huffman_encode(data, symbol_bits))
+
+
+def _pack_with_bit_packer(data: bitarray, codes: dict, symbol_bits: int) -> bitarray:
+    # The generic encode_symbols path, regardless of symbol size and code lengths
+    packer = BitPacker()
+    for symbol in read_symbols(data, symbol_bits):
+        packer.pack(*codes[symbol])
+    return packer.to_bitarray()
+
+
+def _pack_as_strings(data: bitarray, codes: dict, symbol_bits: int) -> bitarray:
+    # Reference packing through '0'/'1' strings
+    return bitarray(''.join(format(codes[symbol][0], f'0{codes[symbol][1]}b')
+                            for symbol in read_symbols(data, symbol_bits)))
+
+
+def _assert_bits_equal(expected: bitarray, actual: bitarray) -> None:
+    # Byte-level comparison for the larger inputs, keeping failure output short
+    assert len(expected) == len(actual)
+    assert expected.tobytes() == actual.tobytes()
+
+
+@njit(cache=True)
+def _count_bytes(buf: np.ndarray) -> np.ndarray:
+    """Reference 256-bin byte histogram (compiled to native code)"""
+    counts = np.zeros(256, dtype=np.int64)
+    for byte in buf:
+        counts[byte] += 1
+    return counts
 
 
 def test_frequency_table():
@@ -18,6 +80,24 @@ def test_frequency_table():
     assert freq_table == expected
 
 
+def test_frequency_table_matches_byte_histogram():
+    """Test frequency table building against a plain byte count"""
+    raw = _DIVERSE + bytes(range(256)) + b"\x00" * 10
+    data = bitarray()
+    data.frombytes(raw)
+
+    counts = _count_bytes(np.frombuffer(raw, dtype=np.uint8))
+    expected = {symbol: int(count) for symbol, count in enumerate(counts) if count}
+    assert build_frequency_table(data) == expected
+
+
+def test_frequency_table_little_endian():
+    """Symbol values do not depend on the endianness of the input"""
+    data = bitarray(b2ba(b"hello"), endian='little')
+    assert build_frequency_table(data) == {104: 1, 101: 1, 108: 2, 111: 1}
+    assert build_frequency_table(data, 4) == build_frequency_table(b2ba(b"hello"), 4)
+
+
 def test_huffman_tree_single_symbol():
     """Test tree building with single symbol"""
     freq_table = {65: 5}  # Only 'A'
@@ -29,50 +109,67 @@ def test_huffman_tree_single_symbol():
     assert root.left.symbol == 65
 
 
-def test_huffman_tree_multiple_symbols():
-    """Test tree building with multiple symbols"""
-    freq_table = {65: 1, 66: 2, 67: 3}  # A, B, C
-    root = build_huffman_tree(freq_table)
+class TestHuffmanTree(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # The trees are deterministic, so build them (and their codes) once for the whole class
+        cls.freq = {65: 1, 66: 2, 67: 3}  # A, B, C
+        cls.root = build_huffman_tree(cls.freq)
+        cls.codes = generate_huffman_codes(cls.root)
+        cls.serialized = serialize_tree(cls.root)
 
-    assert root is not None
-    assert not root.is_leaf()
-    assert root.frequency == 6  # Sum of all frequencies
+        cls.balanced_freq = {65: 1, 66: 1}  # A, B with equal frequency
+        cls.balanced_codes = generate_huffman_codes(build_huffman_tree(cls.balanced_freq))
 
+    def test_huffman_tree_multiple_symbols(self):
+        """Test tree building with multiple symbols"""
+        self.assertIsNotNone(self.root)
+        self.assertFalse(self.root.is_leaf())
+        self.assertEqual(self.root.frequency, 6)  # Sum of all frequencies
 
-def test_huffman_codes_generation():
-    """Test code generation"""
-    # Simple tree with known structure
-    freq_table = {65: 1, 66: 1}  # A, B with equal frequency
-    root = build_huffman_tree(freq_table)
-    codes = generate_huffman_codes(root)
+    def test_huffman_codes_generation(self):
+        """Test code generation"""
+        codes = self.balanced_codes
 
-    assert len(codes) == 2
-    assert 65 in codes and 66 in codes
-    # Codes should be different
-    assert codes[65] != codes[66]
-    # Both should be 1 bit for balanced tree
-    assert len(codes[65]) == 1 and len(codes[66]) == 1
+        self.assertEqual(len(codes), 2)
+        self.assertIn(65, codes)
+        self.assertIn(66, codes)
+        # Codes should be different
+        self.assertNotEqual(codes[65], codes[66])
+        # Both should be 1 bit for balanced tree
+        self.assertEqual(codes[65][1], 1)
+        self.assertEqual(codes[66][1], 1)
 
+    def test_tree_serialization(self):
+        """Test tree serialization and deserialization"""
+        deserialized_root, consumed = deserialize_tree(self.serialized)
 
-def test_tree_serialization():
-    """Test tree serialization and deserialization"""
-    freq_table = {65: 1, 66: 2, 67: 3}
-    original_root = build_huffman_tree(freq_table)
+        # Check that consumed bits match serialized length
+        self.assertEqual(consumed, len(self.serialized))
 
-    # Serialize
-    serialized = serialize_tree(original_root)
+        # Codes from the deserialized tree should match the original ones
+        self.assertEqual(generate_huffman_codes(deserialized_root), self.codes)
 
-    # Deserialize
-    deserialized_root, consumed = deserialize_tree(serialized)
 
-    # Check that consumed bits match serialized length
-    assert consumed == len(serialized)
+@pytest.mark.parametrize('data', [bitarray('0'), bitarray('0 101000001'), bitarray('1 0100')],
+                         ids=['internal', 'missing_child', 'short_symbol'])
+def test_deserialize_truncated_tree(data):
+    """Truncated trees raise instead of reading past the end"""
+    with pytest.raises(ValueError):
+        deserialize_tree(data)
 
-    # Generate codes from both trees and compare
-    original_codes = generate_huffman_codes(original_root)
-    deserialized_codes = generate_huffman_codes(deserialized_root)
 
-    assert original_codes == deserialized_codes
+def test_huffman_decode_truncated_tree():
+    """A stream cut inside the tree raises"""
+    encoded = huffman_encode(b2ba(b"hello"))
+    with pytest.raises(ValueError):
+        huffman_decode(encoded[:30])
+
+
+def test_huffman_encode_too_large():
+    """Data whose length does not fit the header raises like an oversized tree does"""
+    with pytest.raises(ValueError):
+        huffman_encode(zeros(8 << LENGTH_FIELD_BITS))
 
 
 def test_huffman_encode_decode_simple():
@@ -92,7 +189,8 @@ def test_huffman_encode_decode_simple():
 
     # Encoded should typically be smaller (or same) for this data
     # Note: For very small data, overhead might make it larger
-    print(f"Original: {len(data)} bits, Encoded: {len(encoded)} bits")
+    if _VERBOSE:
+        print(f"Original: {len(data)} bits, Encoded: {len(encoded)} bits")
 
 
 def test_huffman_encode_decode_repeated_data():
@@ -107,85 +205,102 @@ def test_huffman_encode_decode_repeated_data():
     assert data == decoded
 
     # Should achieve some compression
-    compression_ratio = len(encoded) / len(data)
-    print(f"Compression ratio: {compression_ratio:.4f}")
+    if _VERBOSE:
+        print(f"Compression ratio: {len(encoded) / len(data):.4f}")
 
 
 def test_huffman_empty_data():
     """Test with empty data"""
     empty_data = bitarray()
 
-    encoded = huffman_encode(empty_data)
-    decoded = huffman_decode(encoded)
-
-    assert empty_data == decoded
+    assert empty_data == _roundtrip(empty_data)
 
 
 def test_huffman_single_byte():
     """Test with single byte"""
-    data = bitarray('10101010')  # Single byte
+    data = b2ba(b'\xaa')  # Single byte
 
-    encoded = huffman_encode(data)
-    decoded = huffman_decode(encoded)
-
-    assert data == decoded
+    assert data == _roundtrip(data)
 
 
 def test_huffman_with_binary_data():
     """Test Huffman coding with various binary patterns"""
     # Test with different bit patterns
     test_cases = [
-        bitarray('00000000'),  # All zeros
-        bitarray('11111111'),  # All ones
-        bitarray('10101010'),  # Alternating
-        bitarray('11000011'),  # Mixed
+        zeros(8),  # All zeros
+        ones(8),  # All ones
+        b2ba(b'\xaa'),  # Alternating
+        b2ba(b'\xc3'),  # Mixed
     ]
 
     for data in test_cases:
-        encoded = huffman_encode(data)
-        decoded = huffman_decode(encoded)
-        assert data == decoded, f"Failed for pattern: {data.to01()}"
+        assert data == _roundtrip(data), f"Failed for pattern: {data.to01()}"
+
+
+def test_huffman_little_endian_round_trip():
+    """Round trip little endian input, through the byte aligned and the generic symbol paths"""
+    data = bitarray(b2ba(_DIVERSE + b"hello"), endian='little')
+    for symbol_bits in (8, 4):
+        assert data == _roundtrip(data, symbol_bits)
+
+
+def test_huffman_codes_longer_than_decode_table():
+    """Codes longer than the decode table index are finished by walking the tree"""
+    raw = _fibonacci_skewed(22)
+    data = b2ba(raw)
+    codes = generate_huffman_codes(build_huffman_tree(build_frequency_table(data)))
+    assert max(length for _, length in codes.values()) > DECODE_TABLE_BITS
+
+    _assert_bits_equal(data, _roundtrip(data))
+    # The rare long codes also decode when they are interleaved with the short ones
+    shuffled = b2ba(bytes(np.random.default_rng(0).permutation(np.frombuffer(raw, dtype=np.uint8))))
+    _assert_bits_equal(shuffled, _roundtrip(shuffled))
+
+
+@pytest.mark.parametrize('symbol_bits', [8, 16])
+def test_encode_symbols_kernel_matches_bit_packer(symbol_bits):
+    """The compiled kernel packs exactly the bits of the BitPacker path"""
+    for raw in (b"hello", _DIVERSE, _fibonacci_skewed(22)[::7]):
+        data = b2ba(raw + bytes(len(raw) % 2))
+        codes = generate_huffman_codes(build_huffman_tree(build_frequency_table(data, symbol_bits)))
+        _assert_bits_equal(_pack_with_bit_packer(data, codes, symbol_bits), encode_symbols(data, codes, symbol_bits))
+
+
+def test_encode_symbols_bit_packer_fallback():
+    """Symbol sizes and code lengths the kernel does not take go through the BitPacker"""
+    data = b2ba(_DIVERSE + b"hello")
+    # Symbol size outside the kernel's
+    codes = generate_huffman_codes(build_huffman_tree(build_frequency_table(data, 4)))
+    _assert_bits_equal(_pack_as_strings(data, codes, 4), encode_symbols(data, codes, 4))
+
+    # Codes too long for the kernel's accumulator
+    codes = {symbol: (symbol, KERNEL_MAX_CODE_BITS + 4) for symbol in set(data.tobytes())}
+    _assert_bits_equal(_pack_as_strings(data, codes, 8), encode_symbols(data, codes, 8))
 
 
 def test_huffman_compression_effectiveness():
     """Test compression effectiveness on different data types"""
 
     # High repetition - should compress well
-    repetitive_data = bitarray()
-    repetitive_data.frombytes(b"aaaaaaaaaa" * 10)
+    repetitive_data = b2ba(_REPETITIVE)
 
     encoded_rep = huffman_encode(repetitive_data)
-    rep_ratio = len(encoded_rep) / len(repetitive_data)
 
     # Random-like data - should not compress well
-    diverse_data = bitarray()
-    diverse_data.frombytes(b"abcdefghijklmnopqrstuvwxyz" * 3)
+    diverse_data = b2ba(_DIVERSE)
 
     encoded_div = huffman_encode(diverse_data)
-    div_ratio = len(encoded_div) / len(diverse_data)
 
-    print(f"Repetitive data compression ratio: {rep_ratio:.4f}")
-    print(f"Diverse data compression ratio: {div_ratio:.4f}")
+    if _VERBOSE:
+        print(f"Repetitive data compression ratio: {len(encoded_rep) / len(repetitive_data):.4f}")
+        print(f"Diverse data compression ratio: {len(encoded_div) / len(diverse_data):.4f}")
 
     # Repetitive should compress better (though small data has overhead)
     # This is more of an informational test
-    assert huffman_decode(encoded_rep) == repetitive_data
-    assert huffman_decode(encoded_div) == diverse_data
+    _assert_bits_equal(repetitive_data, huffman_decode(encoded_rep))
+    _assert_bits_equal(diverse_data, huffman_decode(encoded_div))
 
 
 if __name__ == "__main__":
-    # Run tests manually if executed directly
-    test_frequency_table()
-    test_huffman_tree_single_symbol()
-    test_huffman_tree_multiple_symbols()
-    test_huffman_codes_generation()
-    test_tree_serialization()
-    test_huffman_encode_decode_simple()
-    test_huffman_encode_decode_repeated_data()
-    test_huffman_empty_data()
-    test_huffman_single_byte()
-    test_basic_huffman_coding_wrapper()
-    test_huffman_with_binary_data()
-    test_huffman_compression_effectiveness()
-
-    print("All tests passed!")
+    # Run tests manually if executed directly: the plain functions, the parametrized ones and TestHuffmanTree
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,188 @@
+import unittest
+from functools import lru_cache
+from pathlib import Path
+import numpy as np
+from bitarray import bitarray, frozenbitarray
+from lampel_ziv import basic_lempel_ziv, convert_lampel_ziv_list_to_binarray
+from hashed_lampel_ziv import hashed_lempel_ziv, MAX_CHAIN
+
+TEST_CONFIG = {
+    'minimum_match_length': 1
+}
+
+
+@lru_cache(maxsize=512)
+def _b2ba_cached(data: bytes) -> frozenbitarray:
+    ba = bitarray()
+    ba.frombytes(data)
+    return frozenbitarray(ba)
+
+
+def b2ba(data: bytes) -> bitarray:
+    # Mutable copy of the cached conversion
+    return bitarray(_b2ba_cached(data))
+
+
+# Static round trip inputs, converted once at import
+ROUND_TRIP_CORPUS = [_b2ba_cached(text) for text in (
+    b'A', b'AB', b'ABC', b'ABCD', b'AAAA', b'ABAB', b'ABCABC',
+    b"Hello, World! This is a test message with some repetition. Hello again!",
+)]
+
+# Hashed LZ inputs: the text above and a slice of a sample file
+HASHED_CORPUS = [ROUND_TRIP_CORPUS[-1], _b2ba_cached(Path(__file__).with_name('Samp1.bin').read_bytes()[:4096])]
+
+
+class TestBasicLempelZiv(unittest.TestCase):
+
+    def test_empty_data(self):
+        """Test with empty bitarray"""
+        data = bitarray()
+        result = basic_lempel_ziv(data, 1, 1, **TEST_CONFIG)
+        self.assertEqual(result, [])
+
+    def test_single_byte(self):
+        """Test with single byte"""
+        data = b2ba(b'A')  # 'A' = 0x41 = 01000001
+        result = basic_lempel_ziv(data, 1, 1, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A'))]  # No match found for first byte
+        self.assertEqual(result, expected)
+
+    def test_two_same_bytes(self):
+        """Test with two identical bytes"""
+        data = b2ba(b'AA')
+        result = basic_lempel_ziv(data, 1, 1, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (0, 0, b2ba(b'A'))]
+        self.assertEqual(result, expected)
+
+    def test_two_different_bytes(self):
+        """Test with two different bytes"""
+        data = b2ba(b'AB')
+        result = basic_lempel_ziv(data, 1, 1, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (0, 0, b2ba(b'B'))]
+        self.assertEqual(result, expected)
+
+    def test_simple_pattern(self):
+        """Test simple repeating pattern"""
+        data = b2ba(b'ABAB')
+        result = basic_lempel_ziv(data, 2, 2, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (0, 0, b2ba(b'B')), (2, 1, b2ba(b'B'))]
+        self.assertEqual(result, expected)
+
+    def test_longer_matches(self):
+        """Test that longer matches are found"""
+        data = b2ba(b'ABABA')
+        result = basic_lempel_ziv(data, 2, 2, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (0, 0, b2ba(b'B')), (2, 2, b2ba(b'A'))]
+        self.assertEqual(result, expected)
+
+    def test_repeated_byte_pattern(self):
+        """Test with repeated byte pattern"""
+        data = b2ba(b'AAAAA')
+        result = basic_lempel_ziv(data, 3, 3, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (1, 3, b2ba(b'A'))]
+        self.assertEqual(result, expected)
+
+    def test_comprehensive_pattern(self):
+        """Comprehensive test with longer pattern"""
+        data = b2ba(b'ABCABC')
+        result = basic_lempel_ziv(data, 3, 3, **TEST_CONFIG)
+        expected = [(0, 0, b2ba(b'A')), (0, 0, b2ba(b'B')), (0, 0, b2ba(b'C')), (3, 2, b2ba(b'C'))]
+        self.assertEqual(result, expected)
+
+
+class TestRoundTrip(unittest.TestCase):
+    """Test that compression and decompression work correctly together"""
+
+    def test_round_trip_corpus(self):
+        """Test round trip for every corpus input, compared in one byte-level check"""
+        # Each input is compressed on its own so matches never cross input boundaries
+        decoded = [convert_lampel_ziv_list_to_binarray(basic_lempel_ziv(bitarray(data), 256, 32, **TEST_CONFIG))
+                   for data in ROUND_TRIP_CORPUS]
+        self.assertEqual([len(d) for d in decoded], [len(d) for d in ROUND_TRIP_CORPUS])
+
+        expected = np.frombuffer(sum(ROUND_TRIP_CORPUS, bitarray()).tobytes(), dtype=np.uint8)
+        actual = np.frombuffer(sum(decoded, bitarray()).tobytes(), dtype=np.uint8)
+        self.assertTrue((expected == actual).all())
+
+
+class TestHashedLempelZiv(unittest.TestCase):
+
+    def test_little_endian_input(self):
+        """Steps do not depend on the endianness of the input"""
+        text = b"Hello, World! This is a test message with some repetition. Hello again!"
+        big = b2ba(text)
+        little = bitarray(big, endian='little')
+        steps = hashed_lempel_ziv(little, 256, 32, 2)
+        self.assertEqual(steps, hashed_lempel_ziv(big, 256, 32, 2))
+        self.assertEqual(convert_lampel_ziv_list_to_binarray(steps), big)
+
+    def test_matches_exhaustive_search(self):
+        """With single byte hashes and an unbounded chain, match lengths equal the exhaustive search"""
+        # Small windows keep reusing slots whose positions left the window
+        data = b2ba(b"Hello, World! This is a test message with some repetition. Hello again!" * 3)
+        for search_length in (4, 8, 16):
+            expected = [length for _, length, _ in basic_lempel_ziv(data, search_length, 8)]
+            steps = hashed_lempel_ziv(data, search_length, 8, 1, max_chain=search_length)
+            self.assertEqual([length for _, length, _ in steps], expected)
+
+
+    def test_round_trip_small_windows(self):
+        """Round trip with windows small enough for the hash table to keep dropping stale positions"""
+        for data in HASHED_CORPUS:
+            for search_length, match_length, minimum_match_length in ((0, 4, 1), (1, 4, 1), (4, 8, 2), (16, 16, 3), (300, 64, 4)):
+                steps = hashed_lempel_ziv(data, search_length, match_length, minimum_match_length)
+                self.assertEqual(convert_lampel_ziv_list_to_binarray(steps), data)
+
+    def test_window_larger_than_input(self):
+        """The table is sized from the input, so a huge window on a small input stays cheap"""
+        data = b2ba(b'ABCABCABC')
+        for search_length in (1 << 24, 1 << 30):
+            steps = hashed_lempel_ziv(data, search_length, 8, 1)
+            self.assertEqual(convert_lampel_ziv_list_to_binarray(steps), data)
+
+    def test_steps_within_bounds(self):
+        """Offsets stay within the search window and lengths within match_length"""
+        for data in HASHED_CORPUS:
+            for search_length, match_length in ((8, 4), (64, 32), (255, 255)):
+                for offset, length, _ in hashed_lempel_ziv(data, search_length, match_length, 3):
+                    self.assertLessEqual(offset, search_length)
+                    self.assertLessEqual(length, match_length)
+                    self.assertEqual(offset == 0, length == 0)
+
+    def test_longer_chain(self):
+        """A longer chain finds matches at least as long as the most recent candidate alone"""
+        data = HASHED_CORPUS[-1]
+        single = hashed_lempel_ziv(data, 256, 64, 3, max_chain=1)
+        chained = hashed_lempel_ziv(data, 256, 64, 3, max_chain=MAX_CHAIN)
+        for steps in (single, chained):
+            self.assertEqual(convert_lampel_ziv_list_to_binarray(steps), data)
+
+        # Both parse the same until the longer chain finds a longer match than the most recent candidate
+        first_difference = next(k for k, (a, b) in enumerate(zip(single, chained)) if a != b)
+        self.assertGreater(chained[first_difference][1], single[first_difference][1])
+        self.assertLess(len(chained), len(single))
+
+    def test_emit_matches_returned_steps(self):
+        """emit receives the same steps as the returned list, which is then empty"""
+        for data in HASHED_CORPUS:
+            emitted = []
+            returned = hashed_lempel_ziv(data, 64, 32, 3,
+                                         emit=lambda offset, length, next_byte: emitted.append((offset, length, next_byte)))
+            self.assertEqual(returned, [])
+            steps = hashed_lempel_ziv(data, 64, 32, 3)
+            self.assertEqual(emitted, [(offset, length, next_byte.tobytes()[0]) for offset, length, next_byte in steps])
+
+
+class MinReproduce(unittest.TestCase):
+    def test_reproduce(self):
+        """Test the minimal reproduce case"""
+        # Convert the bit pattern to a byte-aligned pattern
+        # Original: '01011' -> pad to '01011000' (5 bits -> 8 bits)
+        data = bitarray('01011000')  # Padded to byte boundary
+        lz_triplets = basic_lempel_ziv(data, 256, 32, **TEST_CONFIG)
+        decoded = convert_lampel_ziv_list_to_binarray(lz_triplets)
+        self.assertEqual(data, decoded)
+
+if __name__ == '__main__':
+    unittest.main()
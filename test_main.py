@@ -0,0 +1,37 @@
+from pathlib import Path
+import pytest
+from bitarray import bitarray
+from hashed_lampel_ziv import hashed_lempel_ziv
+from main import CONFIG
+from nat_encoder import SMALL_NUMBER_BITS
+
+
+def b2ba(data: bytes) -> bitarray:
+    ba = bitarray()
+    ba.frombytes(data)
+    return ba
+
+
+SAMPLE_SLICE = Path(__file__).with_name('Samp1.bin').read_bytes()[:8192]
+# Repeats 26 bytes apart, long enough for offsets and lengths above the small number range
+LONG_MATCHES = b"abcdefghijklmnopqrstuvwxyz" * 40 + b"0123456789" * 3
+
+
+@pytest.mark.parametrize('raw', [b'', b'A', b"Hello, World! Hello again!", LONG_MATCHES, SAMPLE_SLICE],
+                         ids=['empty', 'single', 'text', 'long_matches', 'sample'])
+def test_encoder_decoder_round_trip(encoder, decoder, raw):
+    data = b2ba(raw)
+    assert decoder(encoder(data)) == data
+
+
+def test_long_matches_use_large_numbers():
+    """The long matches input really codes offsets and lengths past the small number range"""
+    steps = hashed_lempel_ziv(b2ba(LONG_MATCHES), **CONFIG)
+    small_max = (1 << SMALL_NUMBER_BITS) - 1
+    assert max(offset for offset, _, _ in steps) > small_max
+    assert max(length for _, length, _ in steps) > small_max
+
+
+def test_encoder_decoder_little_endian(encoder, decoder):
+    data = bitarray(b2ba(SAMPLE_SLICE[:1024]), endian='little')
+    assert decoder(encoder(data)) == data
@@ -1,33 +1,60 @@
-from bitarray import bitarray
-from nat_encoder import encode_number, decode_number
+import pytest
+from bit_packer import BitPacker
+from nat_encoder import encode_number, decode_number, number_code_table, SMALL_NUMBER_BITS
 
-def test_small_numbers():
-    arr = bitarray()
-    encode_number(arr, 0)
-    assert decode_number(arr) == 0
-    assert len(arr) == 0
+@pytest.mark.parametrize('number', [0, 8, 1000])
+def test_single_number(number):
+    packer = BitPacker()
+    encode_number(packer, number)
+    arr = packer.to_bitarray()
+    value, pos = decode_number(arr.tobytes(), 0)
+    assert value == number
+    assert pos == len(arr)
 
 def test_multiple_small_nums():
-    arr = bitarray()
-    encode_number(arr, 0)
-    encode_number(arr, 1)
-    encode_number(arr, 2)
-    encode_number(arr, 3)
-    assert decode_number(arr) == 0
-    assert decode_number(arr) == 1
-    assert decode_number(arr) == 2
-    assert decode_number(arr) == 3
-    assert len(arr) == 0
-
-
-def test_big_number():
-    arr = bitarray()
-    encode_number(arr, 1000)
-    assert decode_number(arr) == 1000
-    assert len(arr) == 0
-
-def test_8():
-    arr = bitarray()
-    encode_number(arr, 8)
-    assert decode_number(arr) == 8
-    assert len(arr) == 0
+    """Test all small numbers (0 to 2^SMALL_NUMBER_BITS - 1)"""
+    packer = BitPacker()
+    max_small = (1 << SMALL_NUMBER_BITS) - 1
+
+    # Encode all small numbers
+    for i in range(max_small + 1):
+        encode_number(packer, i)
+
+    # Decode and verify all small numbers
+    arr = packer.to_bitarray()
+    buf = arr.tobytes()
+    pos = 0
+    for i in range(max_small + 1):
+        value, pos = decode_number(buf, pos)
+        assert value == i
+
+    assert pos == len(arr)
+
+def test_boundary_numbers():
+    """Test the boundary between small and large numbers"""
+    packer = BitPacker()
+    # Largest small number: (2^SMALL_NUMBER_BITS - 1)
+    max_small = (1 << SMALL_NUMBER_BITS) - 1
+    # Smallest large number: 2^SMALL_NUMBER_BITS
+    min_large = 1 << SMALL_NUMBER_BITS
+
+    encode_number(packer, max_small)
+    encode_number(packer, min_large)
+    arr = packer.to_bitarray()
+    buf = arr.tobytes()
+    pos = 0
+    value, pos = decode_number(buf, pos)
+    assert value == max_small
+    value, pos = decode_number(buf, pos)
+    assert value == min_large
+    assert pos == len(arr)
+
+def test_number_code_table():
+    table = number_code_table(300)
+    assert len(table) == 301
+    for number in (0, 7, 8, 255, 300):
+        packer = BitPacker()
+        packer.pack(*table[number])
+        value, pos = decode_number(packer.to_bitarray().tobytes(), 0)
+        assert value == number
+        assert pos == table[number][1]